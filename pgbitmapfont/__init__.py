@@ -37,42 +37,140 @@ class BitmapFontProtocol(Protocol):
 ########################################################
 ### Internal Package functions
 ########################################################
+import os # For checking the modification time of the cached files
 import json # For reading the JSON font definition
+try:
+    from orjson import loads as json_loads # Faster JSON parser - optional, its errors subclass json.JSONDecodeError
+except ImportError:
+    from json import loads as json_loads
 import re # For removing C-style comments before processing JSON
+from functools import lru_cache # For remembering already parsed color definitions
+from collections import OrderedDict # For the least recently used caches of rendered surfaces
+
+RENDER_CACHE_PIXELS = 1_000_000 # Default max total number of pixels of rendered texts remembered by every font instance
+WORD_CACHE_MAX_LENGTH = 16 # Longer words are blitted character by character instead of being remembered
+GLYPH_SET_CACHE_SIZE = 16 # Max number of recently requested colors remembered by every font instance - characters are recolored for the repeated ones
+
+_COMMENT_RE = re.compile(r"//.*", re.MULTILINE) # C-style comment in the JSON font definition
 
 def clip(surf: pygame.Surface, x: int, y: int, x_size: int, y_size: int) -> pygame.Surface:
     """Get defined surface from the larger surface."""
 
-    handle_surf = surf.copy()
-    clip_rect = pygame.Rect(x, y, x_size, y_size)
-    handle_surf.set_clip(clip_rect)
-    image = surf.subsurface(handle_surf.get_clip())
+    # Limit the area to the surface bounds and copy it out of a zero-copy subsurface
+    clip_rect = pygame.Rect(x, y, x_size, y_size).clip(surf.get_rect())
 
-    return image.copy()
+    return surf.subsurface(clip_rect).copy()
 
 def color_swap(surf: pygame.Surface, old_color: pygame.Color, new_color: pygame.Color) -> pygame.Surface:
-    """Swap one color to other color in the image."""
+    """Swap one color to other color in the image. The image is changed in place and returned."""
+
+    # Replace the pixels of the old color in one pass, without allocating a new surface
+    with pygame.PixelArray(surf) as pixels:
+        pixels.replace(old_color, new_color)
+
+    return surf
+
+if hasattr(pygame.Surface, 'fblits'):
+    def blit_all(surf: pygame.Surface, sequence: list[tuple[pygame.Surface, tuple[int, int]]]) -> None:
+        """Blit all the (source, position) pairs onto the surface in one call - pygame-ce fast path."""
+        surf.fblits(sequence)
+else:
+    def blit_all(surf: pygame.Surface, sequence: list[tuple[pygame.Surface, tuple[int, int]]]) -> None:
+        """Blit all the (source, position) pairs onto the surface in one call."""
+        surf.blits(sequence, doreturn=0)
+
+@lru_cache(maxsize=128)
+def _parse_color_str(color_str: str) -> tuple[int, int, int, int]:
+    """Parse the color string only once - the RGBA tuple is immutable, hence safe to share."""
+    return tuple(pygame.Color(color_str))
+
+def parse_color(color) -> pygame.Color:
+    """Get new color from the color definition in the JSON font file. String definitions are parsed only once."""
+
+    if isinstance(color, str):
+        return pygame.Color(_parse_color_str(color))
+
+    return pygame.Color(color)
+
+class SubstitutionTable(dict):
+    """Translation table for str.translate substituting the characters that are not
+    contained in the font by the default character. Every character is checked only
+    the first time it is translated, then it is remembered in the table."""
+
+    def __init__(self, characters: dict, default_char: str):
+        super().__init__()
+        self.characters = characters
+        self.default_ord = ord(default_char)
 
-    # Create new empty surface and fill it with the new color
-    img_copy = pygame.Surface(surf.get_size())
-    img_copy.fill(new_color)
+    def __missing__(self, key: int) -> int:
+        value = self[key] = key if chr(key) in self.characters else self.default_ord
+        return value
 
-    # Set transparency on the old surface on the old color
-    surf.set_colorkey(old_color)
+class SurfaceCache(OrderedDict):
+    """Least recently used cache of rendered surfaces limited by the total number of their
+    pixels instead of the number of entries, so that a few large texts cannot take all the
+    memory. Every entry is stored together with its number of pixels. 0 disables the cache."""
 
-    # Blit the old image to the new surface - as old color is transparent, colors are swaped
-    img_copy.blit(surf, (0, 0))
+    def __init__(self, max_pixels: int):
+        super().__init__()
+        self.max_pixels = max_pixels
+        self.pixels = 0
 
-    return img_copy
+    def recall(self, key):
+        """Return the value remembered for the key, or None if it is not in the cache."""
+        entry = self.get(key)
+
+        if entry is None:
+            return None
+
+        self.move_to_end(key)
+        return entry[0]
+
+    def remember(self, key, value, pixels: int) -> bool:
+        """Remember the value unless it is empty or alone exceeds the limit, forget the least
+        recently used values until the cache fits the limit again. Returns True if remembered."""
+
+        if not 0 < pixels <= self.max_pixels:
+            return False
+
+        self[key] = (value, pixels)
+        self.pixels += pixels
+
+        while self.pixels > self.max_pixels:
+            self.pixels -= self.popitem(last=False)[1][1]
+
+        return True
+
+    def clear(self):
+        super().clear()
+        self.pixels = 0
 
 def load_font_data_from_file(path: str) -> dict:
-    """Load the data from json to dictionary."""
+    """Load the data from json to dictionary. The file is parsed again only after it was modified,
+    so the returned dictionary is shared by all the fonts loaded from the file and must not be changed."""
+
+    # Modification time is part of the cache key - edited font file is parsed again
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Bitmap font definition file '{path}' was not found.")
+
+    return _load_font_data(str(path), mtime_ns)
+
+@lru_cache(maxsize=32)
+def _load_font_data(path: str, mtime_ns: int) -> dict:
+    """Parse the font json file - remembered for the given path and modification time."""
 
     # Open the font json file
     try:
         with open(path, 'r') as font_file:
             json_font_data = font_file.read()
-            font_data = json.loads(re.sub("//.*", "", json_font_data, flags=re.MULTILINE)) # Remove C-style comments before processing JSON
+
+            # Remove C-style comments before processing JSON - only if there can be any
+            if '//' in json_font_data:
+                json_font_data = _COMMENT_RE.sub("", json_font_data)
+
+            font_data = json_loads(json_font_data)
             return font_data
     except FileNotFoundError:
         raise FileNotFoundError(f"Bitmap font definition file '{path}' was not found.")
@@ -83,18 +181,268 @@ def load_font_data_from_file(path: str) -> dict:
 
 
 def load_font_image(path: str, font_image: str) -> pygame.Surface:
-    """Load the texture image from the file."""
+    """Load the texture image from the file and convert it to the display pixel format.
+    The display mode must be set before the font is created."""
 
     # Evaluate the font image path
-    font_image_path = Path(path.parent, font_image).resolve() # Try to evaluate as relative to font file path
+    font_image_path = Path(Path(path).parent, font_image) # Try to evaluate as relative to font file path
 
     if not font_image_path.is_file():
         font_image_path = Path(font_image) # If not successful evaluate as relative to py project path
 
-    assert font_image_path.is_file() == True, f"Cannot find font image file at '{font_image_path}'."
+        if not font_image_path.is_file():
+            raise FileNotFoundError(f"Cannot find font image file at '{font_image_path.resolve()}'.")
 
     return pygame.image.load(font_image_path).convert()
 
+class TextRenderMixin:
+    """Text layout and caching shared by all the bitmap fonts. The font provides the character
+    images in _glyphs, their widths in _char_widths and the caches created in its __init__."""
+
+    __slots__ = ()
+
+    @property
+    def default_char(self) -> str:
+        ''' Character to be used for the character not present in the font.
+        '''
+        return self._default_char
+
+    @default_char.setter
+    def default_char(self, default_char: str):
+        # Texts rendered with the old default character are no longer valid
+        self._default_char = default_char
+        self._substitution_table = SubstitutionTable(self.characters, default_char)
+        self._render_cache.clear()
+
+    @property
+    def spacing(self) -> tuple[int, int]:
+        ''' Horizontal and vertical space between the characters in px.
+        '''
+        return self._spacing
+
+    @spacing.setter
+    def spacing(self, spacing: tuple[int, int]):
+        # Words and texts rendered with the old spacing are no longer valid
+        self._spacing = spacing
+        # Distance between the tops of two consecutive rows of text
+        self._row_stride = self.font_height + spacing[1]
+        self._word_cache.clear()
+        self._render_cache.clear()
+
+    def _get_text_width(self, text: str) -> int:
+        ''' Returns width in pixels of the given text.
+        It is used internally in render function to determine the final dimensions
+        of a font surface.
+        '''
+        return sum(map(self._char_widths.__getitem__, text)) + (self.spacing[0] * len(text))
+
+    def _get_text_height(self, text: str=None) -> int:
+        ''' Returns height in pixels of the given text - without the vertical spacing.
+        '''
+        return self.font_height
+
+    def _substitute_unsuported_chars(self, text: str) -> str:
+        '''Cleans the text from characters that are not supported
+        by the font and substitutes them with the default character.
+        '''
+        # Most of the texts contain only supported characters - checked in one C-level pass
+        if self._supported_chars.issuperset(text):
+            return text
+
+        return text.translate(self._substitution_table)
+
+    def _get_glyphs(self, color: tuple[int, int, int, int]=None) -> dict[str, tuple[pygame.Surface, int]]:
+        ''' Returns the character images together with their widths in the given color,
+        or None if the characters are not recolored and the rendered text must be recolored
+        instead. Fonts that cannot be recolored always return the characters as they are.
+        '''
+        return self._glyphs
+
+    def _get_word_glyph(self, word: str, color: tuple[int, int, int, int]=None) -> tuple[pygame.Surface, int]:
+        ''' Returns image of the word in the given color together with its width
+        including the spacing after the last character. Words are cached, so that
+        rows made of already seen words need only one blit per word.
+        '''
+
+        # Return the already rendered word if available
+        word_key = (word, color)
+        word_glyph = self._word_cache.recall(word_key)
+
+        if word_glyph is not None:
+            return word_glyph
+
+        # Collect the character images of the word together with their positions
+        glyphs = self._get_glyphs(color)
+        blit_sequence = []
+        x = 0
+
+        # Bind to local names - the loop runs for every character
+        get_glyph = glyphs.get
+        add_blit = blit_sequence.append
+        spacing_x = self.spacing[0]
+
+        for char in word:
+            glyph = get_glyph(char)
+
+            # Skip if the character is not defined by the font
+            if glyph is None:
+                continue
+
+            add_blit((glyph[0], (x, 0)))
+            x += glyph[1] + spacing_x
+
+        # Prepare transparent surface for the word - in the same pixel format as the font image.
+        # It ends with the last character, not with the spacing after it (which can be negative).
+        word_surf = pygame.Surface((max(x - spacing_x, 0), self.font_height), 0, self.font_img)
+
+        if self._fill_background:
+            word_surf.fill(self._colorkey_pixel)
+
+        blit_all(word_surf, blit_sequence)
+        word_surf.set_colorkey(self._colorkey_pixel)
+
+        # Remember the rendered word, forget the least recently used ones if the cache is full
+        word_glyph = (word_surf, x)
+        self._word_cache.remember(word_key, word_glyph, word_surf.get_width() * self.font_height)
+
+        return word_glyph
+
+    def _get_row_blits(self, text: str, x: int=0, y: int=0, color: tuple[int, int, int, int]=None) -> list[tuple[pygame.Surface, tuple[int, int]]]:
+        ''' Returns the word and character images of the text row in the given color
+        together with their positions, starting at the given coordinates. It is used
+        internally to blit whole rows of text in one call.
+        '''
+
+        # Collect the word and character images together with their positions
+        blit_sequence = []
+
+        # Bind to local names - the loop runs for every word
+        get_glyph = self._get_glyphs(color).get
+        get_word_glyph = self._get_word_glyph
+        add_blit = blit_sequence.append
+        spacing_x = self.spacing[0]
+        space_glyph = get_glyph(' ')
+
+        # Without the word cache every character is blitted directly
+        max_word_length = WORD_CACHE_MAX_LENGTH if self._word_cache.max_pixels else 1
+
+        for i, word in enumerate(text.split(' ')):
+
+            # Words are separated by the space character - skipped if not defined by the font
+            if i and space_glyph is not None:
+                add_blit((space_glyph[0], (x, y)))
+                x += space_glyph[1] + spacing_x
+
+            # Words are blitted as one cached image - single characters and long words
+            # (CJK text, long tokens) character by character, so they do not flood the cache
+            if 1 < len(word) <= max_word_length:
+                word_surf, word_width = get_word_glyph(word, color)
+                add_blit((word_surf, (x, y)))
+                x += word_width
+                continue
+
+            for char in word:
+                glyph = get_glyph(char)
+
+                # Skip if the character is not defined by the font
+                if glyph is None:
+                    continue
+
+                add_blit((glyph[0], (x, y)))
+                x += glyph[1] + spacing_x
+
+        return blit_sequence
+
+    def _get_rows(self, text: str) -> tuple[list[str], list[int]]:
+        ''' Splits the text to rows cleaned from unsupported characters and returns
+        them together with their widths in pixels. Shared by get_rect and render
+        so the text is split and measured in one pass.
+        '''
+        rows = [self._substitute_unsuported_chars(row_text) for row_text in text.split('\n')]
+
+        return rows, [self._get_text_width(row_text) for row_text in rows]
+
+    def get_rect(self, text: str) -> pygame.Rect:
+        ''' Return the dimensions of the surface with generated text as a pygame.Rect.
+        '''
+        rows, rows_widths = self._get_rows(text)
+
+        return pygame.Rect(0, 0, max(rows_widths), self._row_stride * len(rows))
+
+    def render(self, text: str, fgcolor: pygame.Color=None, align: str='LEFT') -> tuple[pygame.Surface, pygame.Rect]:
+        ''' Renders given text in given color and in given
+        alignment to the new surface.
+        Rendered texts are cached - every call returns a new copy of the
+        surface, so it can be modified freely.
+        '''
+
+        # Single row text looks the same in every alignment - render and cache it only once
+        if '\n' not in text:
+            align = 'LEFT'
+
+        # Return the already rendered text if available
+        color = None if fgcolor is None else tuple(pygame.Color(fgcolor))
+        cache_key = (text, color, align)
+        cached_surface = self._render_cache.recall(cache_key)
+
+        if cached_surface is not None:
+            return (cached_surface.copy(), cached_surface.get_rect())
+
+        # Height of one row of text including the vertical spacing
+        row_height = self._row_stride
+
+        # Clear the rows from not covered characters and measure them
+        rows, rows_widths = self._get_rows(text)
+
+        # Store the width of the longest row and the height of the whole text surface
+        max_width = max(rows_widths)
+        height = row_height * len(rows)
+
+        # Generate the new surface - in the same pixel format as the font image so blits need no conversion
+        final_surface = pygame.Surface((max_width, height), 0, self.font_img)
+
+        # Fill the surface with the font background color
+        if self._fill_background:
+            final_surface.fill(self._colorkey_pixel)
+
+        # Characters recolored for the color if available, otherwise the text is recolored at once after blitting
+        glyph_color = None if color is None or self._get_glyphs(color) is None else color
+
+        # Collect the character images of all rows - no intermediate row surfaces are needed
+        blit_sequence = []
+
+        for i, (row_text, row_width) in enumerate(zip(rows, rows_widths)):
+
+            # Horizontal alignment
+            if align == 'LEFT':
+                x_align = 0
+            elif align == 'RIGHT':
+                x_align = max_width - row_width
+
+            elif align in ['CENTER', 'CENTRE']:
+                x_align = (max_width - row_width) // 2
+
+            else:
+                x_align = 0
+
+            blit_sequence.extend(self._get_row_blits(row_text, x_align, i * row_height, glyph_color))
+
+        # Blit the whole text onto the surface in one call
+        blit_all(final_surface, blit_sequence)
+
+        # Recolor the whole text at once if the characters are not recolored yet - empty text has nothing to recolor
+        if glyph_color != color and blit_sequence:
+            color_swap(final_surface, self.font_color, color)
+
+        # Must set colorkey otherwise background will not be transparent
+        final_surface.set_colorkey(self._colorkey_pixel)
+
+        # The caller gets a copy of the remembered text - changes to it must not affect the cache
+        if self._render_cache.remember(cache_key, final_surface, max_width * height):
+            final_surface = final_surface.copy()
+
+        return (final_surface, pygame.Rect(0, 0, max_width, height))
+
 ########################################################
 ### Public Package classes
 ########################################################
@@ -108,15 +456,16 @@ class BitmapFont:
     A factory class that automatically detects the bitmap font format
     and creates an instance of the appropriate font rendering class.
     """
-    def __new__(cls, path: Path, size: int=None, spacing: tuple[int, int]=(0,0), fgcolor: pygame.Color=None, default_char: str='_', **kwargs):
+    def __new__(cls, path: Path, size: int=None, spacing: tuple[int, int]=(0,0), fgcolor: pygame.Color=None, default_char: str='_', render_cache_pixels: int=RENDER_CACHE_PIXELS, **kwargs):
 
+        # Font data is loaded only once - passed to the font to be created
         font_data = load_font_data_from_file(path=path)
 
         if 'character_order' in font_data:
             instance = super().__new__(BitmapFontFixedHeight)
-            instance.__init__(path=path, size=size, spacing=spacing, fgcolor=fgcolor, default_char=default_char)
+            instance.__init__(path=path, size=size, spacing=spacing, fgcolor=fgcolor, default_char=default_char, render_cache_pixels=render_cache_pixels, font_data=font_data)
             return instance
         else:
             instance = super().__new__(BitmapFontFreeDims)
-            instance.__init__(path=path, size=size, spacing=spacing, fgcolor=fgcolor, default_char=default_char)
+            instance.__init__(path=path, size=size, spacing=spacing, fgcolor=fgcolor, default_char=default_char, render_cache_pixels=render_cache_pixels, font_data=font_data)
             return instance
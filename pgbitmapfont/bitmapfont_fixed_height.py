@@ -38,16 +38,17 @@
         }
 '''
 import pygame
-from . import BitmapFontProtocol, load_font_data_from_file, load_font_image, color_swap
+from . import BitmapFontProtocol, TextRenderMixin, SurfaceCache, load_font_data_from_file, load_font_image, color_swap, parse_color, RENDER_CACHE_PIXELS, GLYPH_SET_CACHE_SIZE
 from pathlib import Path
+from collections import OrderedDict
 
-class BitmapFontFixedHeight(BitmapFontProtocol):
+class BitmapFontFixedHeight(TextRenderMixin, BitmapFontProtocol):
     ''' Class containing character font pictures and necessary information.
     '''
 
-    __slots__ = ['font_height', 'font_img', 'font_color', 'colorkey', 'spacing', 'characters', 'default_char']
+    __slots__ = ['font_height', 'font_img', '_font_color', 'colorkey', '_spacing', 'characters', '_default_char', '_supported_chars', '_substitution_table', '_char_widths', '_glyphs', '_glyph_sets', '_fill_background', '_colorkey_pixel', '_row_stride', '_word_cache', '_render_cache']
 
-    def __init__(self, path: Path, size: int=None, fgcolor: pygame.Color=None, spacing: tuple[int, int]=(1,1), default_char: str='_'):
+    def __init__(self, path: Path, size: int=None, fgcolor: pygame.Color=None, spacing: tuple[int, int]=(1,1), default_char: str='_', render_cache_pixels: int=RENDER_CACHE_PIXELS, font_data: dict=None):
         ''' Prepare bitmap font from predefined path in given size and color.
 
         Parameters:
@@ -66,14 +67,26 @@ class BitmapFontFixedHeight(BitmapFontProtocol):
             :param default_char: Character to be used for the character not present in the font.
             :type default_char: str (char)
 
+            :param render_cache_pixels: Max total number of pixels of the rendered texts, and separately of the rendered words, remembered for reuse. 0 disables remembering of rendered texts and words.
+            :type render_cache_pixels: int
+
+            :param font_data: Already loaded font data from the JSON file. If None, it is loaded from the path.
+            :type font_data: dict
+
             :raise: ValueError - in case there is a problem with font initiation
+            :raise: FileNotFoundError - in case the font definition file or the font image file cannot be found
         '''
 
-        # How many pixels of space between characters
-        self.spacing = spacing
+        # Recently rendered words and texts - forgotten whenever a setting they depend on changes
+        self._word_cache = SurfaceCache(render_cache_pixels)
+        self._render_cache = SurfaceCache(render_cache_pixels)
+
+        # Character images recolored for the colors requested in render
+        self._glyph_sets = OrderedDict()
 
-        # Get font data from the file
-        font_data = load_font_data_from_file(path=path)
+        # Get font data from the file - unless already loaded by the caller
+        if font_data is None:
+            font_data = load_font_data_from_file(path=path)
 
         # Get font image based on the font data
         try:
@@ -85,13 +98,14 @@ class BitmapFontFixedHeight(BitmapFontProtocol):
         # Set color
         try:
             assert ('font_color' in font_data and fgcolor) or not fgcolor, f"Missing 'font_color' key."
-            self.font_color = pygame.Color(font_data.get('font_color'))
+            self.font_color = font_data.get('font_color')
+            if self.font_color: self.font_color = parse_color(self.font_color)
         except AssertionError:
             raise ValueError
 
         # Set colorkey to correctly prepare the transparent parts of the font image
         try:
-            self.colorkey = pygame.Color(font_data.get('colorkey', '#000000'))
+            self.colorkey = parse_color(font_data.get('colorkey', '#000000'))
             assert self.font_color != self.colorkey, 'Color cannot be the same as the color key'
         except AssertionError:
             raise ValueError
@@ -103,10 +117,14 @@ class BitmapFontFixedHeight(BitmapFontProtocol):
         font_height = self.font_img.get_height()
 
         # Calculate the scaling factor for the font size
-        scale = 1 if size is None else size / font_height
+        # Kept as a fraction - integer math keeps the scaled characters pixel aligned
+        scale_num, scale_den = (1, 1) if size is None else (size, font_height)
 
         # Store the scaled font height
-        self.font_height = int(font_height * scale)
+        self.font_height = font_height * scale_num // scale_den
+
+        # How many pixels of space between characters - set once the font height is known
+        self.spacing = spacing
 
         #####
         # Store the coordinates and dimensions of the scaled characters
@@ -115,7 +133,7 @@ class BitmapFontFixedHeight(BitmapFontProtocol):
         # Get the color that is separating the individual characters in the char image
         try:
             assert 'separator_color' in font_data, f"Missing 'separator_color' key."
-            separator_color = pygame.Color(font_data.get('separator_color'))
+            separator_color = parse_color(font_data.get('separator_color'))
         except AssertionError:
             raise ValueError
 
@@ -131,30 +149,26 @@ class BitmapFontFixedHeight(BitmapFontProtocol):
         # Store the char img coordinates and dimensions in the original img file
         self.characters = dict()
 
-        # Keep track of witdh of the current character and number of characters
-        current_char_width = 0
-        character_count = 0
+        # Read the first row of the font image at once and find the separation bars/pixels - the end of every character
+        separator_pixel = self.font_img.map_rgb(separator_color)
+        with pygame.PixelArray(self.font_img) as pixels:
+            separator_xs = [x for x, pixel in enumerate(pixels[:, 0]) if pixel == separator_pixel]
 
-        # Iterate the font image column by column
-        for x in range(self.font_img.get_width()):
+        # Keep track of where the current character starts
+        char_start_x = 0
 
-            # Read the column color and check if encountered the separation bar/pixel - start of the character was found
-            if self.font_img.get_at((x, 0)) == separator_color:
+        for character_count, x in enumerate(separator_xs):
 
-                # Get the coords and dim of the found character - for every character in the string, i.e "Aa" means 2 records, one for 'A' and second for 'a'
-                for char in character_order[character_count]:
-                    # Create a new record in the dictionary
-                    self.characters[char] = dict()
-                    self.characters[char]['x'] = int((x - current_char_width) * scale)
-                    self.characters[char]['y'] = int(0)
-                    self.characters[char]['width'] = int(current_char_width * scale)
-                    self.characters[char]['height'] = int(font_height * scale)
+            # Get the coords and dim of the found character - for every character in the string, i.e "Aa" means 2 records, one for 'A' and second for 'a'
+            for char in character_order[character_count]:
+                # Create a new record in the dictionary
+                self.characters[char] = dict()
+                self.characters[char]['x'] = char_start_x * scale_num // scale_den
+                self.characters[char]['y'] = int(0)
+                self.characters[char]['width'] = (x - char_start_x) * scale_num // scale_den
+                self.characters[char]['height'] = font_height * scale_num // scale_den
 
-                character_count += 1
-                current_char_width = 0 # reset the counter of char width
-
-            else:
-                current_char_width += 1 # count aditional pixel for char width
+            char_start_x = x + 1 # next character starts right after the separator
 
         # Default_char is not defined in the font file, use the first font character instead
         self.default_char = default_char if default_char in self.characters else character_order[0][0]
@@ -163,137 +177,110 @@ class BitmapFontFixedHeight(BitmapFontProtocol):
         if fgcolor is not None:
             self.font_img = color_swap(self.font_img, self.font_color, fgcolor)
 
-        # Scale also the font image
-        self.font_img = pygame.transform.scale(self.font_img, (int(self.font_img.get_width() * scale), int(self.font_img.get_height() * scale)))
+        # Scale also the font image - not needed for the original font size
+        if scale_num != scale_den:
+            self.font_img = pygame.transform.scale(self.font_img, (self.font_img.get_width() * scale_num // scale_den, self.font_img.get_height() * scale_num // scale_den))
 
-    def _get_text_width(self, text: str) -> int:
-        ''' Returns width in pixels of the given text.
-        It is used internally tin render function to determine the final dimensions
-        of a font surface.
-        '''
-        # Use default_char in case that character is not contained in the font
-        return sum([self.characters[char]['width'] for char in text]) + (self.spacing[0] * len(text))
+        # Colorkey mapped to the pixel value of the font image format - used for filling the render surfaces
+        self._colorkey_pixel = self.font_img.map_rgb(self.colorkey)
 
-    def _get_text_height(self, text: str=None) -> int:
-        ''' Returns height in pixels of the given text
-        '''
-        return self.font_height
+        # New surfaces are filled with zero pixels, so the background needs to be filled only if the colorkey maps to other value
+        self._fill_background = self._colorkey_pixel != 0
 
-    def _substitute_unsuported_chars(self, text: str) -> str:
-        '''Cleans the text from characters that are not supported
-        by the font and substitutes them with the default character.
-        '''
-        return ''.join(list(map(lambda c: c if c in self.characters else self.default_char, text)))
+        # Pre-cut the character images from the scaled font image so that rendering does not need to build rects.
+        # Every character gets its own copy with the colorkey already set - blitting from a standalone
+        # RLE encoded surface is faster than blitting from a subsurface of the font image.
+        font_img_rect = self.font_img.get_rect()
+        for char_data in self.characters.values():
+            char_data['rect'] = pygame.Rect(char_data['x'], char_data['y'], char_data['width'], char_data['height'])
+            char_data['surf'] = self.font_img.subsurface(char_data['rect'].clip(font_img_rect)).copy()
+            char_data['surf'].set_colorkey(self._colorkey_pixel, pygame.RLEACCEL)
+
+        # Characters of the font - texts made only of them need no substitution
+        self._supported_chars = frozenset(self.characters)
+
+        # Lookup table of character widths for fast text width calculation
+        self._char_widths = {char: char_data['width'] for char, char_data in self.characters.items()}
 
-    def _render_row(self, text: str) -> pygame.Surface:
-        ''' Returns surface containing text in a row.
-        It is used internally to render the final wrapped text surface
+        # Character image and width packed in a tuple - one lookup per character when rendering
+        self._glyphs = {char: (char_data['surf'], char_data['width']) for char, char_data in self.characters.items()}
+
+    @property
+    def font_color(self) -> pygame.Color:
+        ''' Color of the font in the font image - swapped for the color requested in render.
+        '''
+        return self._font_color
+
+    @font_color.setter
+    def font_color(self, font_color: pygame.Color):
+        # Characters, words and texts recolored from the old font color are no longer valid
+        self._font_color = font_color
+        self._glyph_sets.clear()
+        self._word_cache.clear()
+        self._render_cache.clear()
+
+    def _get_glyphs(self, color: tuple[int, int, int, int]=None) -> dict[str, tuple[pygame.Surface, int]]:
+        ''' Returns the character images together with their widths in the given
+        color, or None if the color is requested for the first time. The characters
+        are recolored only for the colors requested repeatedly, so that the texts
+        rendered in them do not need to be recolored.
         '''
 
-        # Clear the text from not covered characters
-        text = self._substitute_unsuported_chars(text)
+        # Characters in the color of the font image
+        if color is None:
+            return self._glyphs
+
+        # First request of the color - it can be a one-off (e.g. a fade effect), so only
+        # remember it and let the rendered text be recolored instead of all the characters
+        if color not in self._glyph_sets:
+            self._glyph_sets[color] = None
+            if len(self._glyph_sets) > GLYPH_SET_CACHE_SIZE:
+                self._glyph_sets.popitem(last=False)
+            return None
+
+        # Return the already recolored characters if available
+        self._glyph_sets.move_to_end(color)
+        glyphs = self._glyph_sets[color]
 
-        # Prepare empty surface
-        row_surf = pygame.Surface((self._get_text_width(text), self._get_text_height(text)))
+        if glyphs is not None:
+            return glyphs
 
-        # Fill the surface with the font background color
-        row_surf.fill(self.colorkey)
+        # Recolor the copy of the whole font image at once and cut the characters from it
+        font_img = color_swap(self.font_img.copy(), self.font_color, color)
+        glyphs = {}
 
-        # Blit the text onto the surface
-        x_offset = 0
+        for char, (surf, width) in self._glyphs.items():
+            glyph_surf = font_img.subsurface(surf.get_rect(topleft=self.characters[char]['rect'].topleft)).copy()
+            glyph_surf.set_colorkey(self._colorkey_pixel, pygame.RLEACCEL)
+            glyphs[char] = (glyph_surf, width)
 
-        for char in text:
-            try:
-                # Get the part of the font_img with the right character
-                char_data = self.characters[char]
-                char_rect = pygame.Rect(char_data['x'], char_data['y'], char_data['width'], char_data['height'])
-                row_surf.blit(self.font_img, (x_offset, 0), char_rect) # blit only part of the font_img containing the character
-                x_offset += char_data['width'] + self.spacing[0]
-            except KeyError:
-                # Skip if the character is not defined by the font
-                pass
+        # Remember the recolored characters for the repeatedly requested color
+        self._glyph_sets[color] = glyphs
 
-        return row_surf
+        return glyphs
 
     def get_metrics(self, text: str) -> list[tuple[int, int, int, int, int, int]]:
         '''Must be implemented due to compatibility with pygame.freetype.Font.
         Returns dimension of the text (min_x, max_x, min_y, max_y, horizontal_advance_x, horizontal_advance_y).
         In case of BitmapFont min_x = max_x = horizontal_advance_x = width and same for y.
         '''
-        res = []
-        y = self.font_height + self.spacing[1]
-        
-        for char in text:
-            x = self.characters[char]['width'] + self.spacing[0]
-            res.append((x,x,y,y,x,y))
-        
-        return res
-
-    def get_rect(self, text: str) -> pygame.Rect:
-        ''' Return the dimensions of the surface with generated text as a pygame.Rect.
-        '''
-        return pygame.Rect(
-            0, 
-            0, 
-            max([self._get_text_width(self._substitute_unsuported_chars(row_text)) for row_text in text.split('\n')]), 
-            (self._get_text_height() + self.spacing[1]) * len(text.split('\n'))
-            )
+        y = self._row_stride
+        spacing_x = self.spacing[0]
+
+        # All the rows have the same height - only the width differs per character
+        return [(x,x,y,y,x,y) for x in (self._char_widths[char] + spacing_x for char in text)]
 
     def render(self, text: str, fgcolor: pygame.Color=None, align: str='LEFT') -> tuple[pygame.Surface, pygame.Rect]:
         ''' Renders given text in given color and in given
         alignment to the new surface.
+        Rendered texts are cached - every call returns a new copy of the
+        surface, so it can be modified freely.
         '''
 
         assert fgcolor != self.colorkey, 'Color cannot be the same as the color key'
 
-        # Generate each row on a separate surface
-        rows_surfaces = []
-        max_width = 0
-
-        # Prepare individual surface for every row
-        for row_text in text.split('\n'):
-
-            # Generate the row surface
-            row_surf = self._render_row(row_text)
-
-            # Update the max row width value
-            max_width = max(max_width, row_surf.get_width())
-
-            # Add to the list of row surfaces
-            rows_surfaces.append(row_surf)
-        
-        # Store the height of the whole text surface
-        height = (self._get_text_height() + self.spacing[1]) * len(rows_surfaces)
-
-        # Generate the new surface
-        final_surface = pygame.Surface((max_width, height))
-
-        # Fill the surface with the font background color
-        final_surface.fill(self.colorkey)
-
-        for i, row_surface in enumerate(rows_surfaces):
-
-            # Horizontal alignment
-            if align == 'LEFT':
-                x_align = 0
-            elif align == 'RIGHT':
-                #x_align = text_dim[0] - row_surface.get_width()
-                x_align = max_width - row_surface.get_width()
-
-            elif align in ['CENTER', 'CENTRE']:
-                #x_align = (text_dim[0] - row_surface.get_width()) // 2
-                x_align = (max_width - row_surface.get_width()) // 2
-
-            else:
-                x_align = 0
-
-            final_surface.blit(row_surface, (x_align, i * (self._get_text_height() + self.spacing[1])))
-
-            # Change color as required
-            if fgcolor is not None:
-                final_surface = color_swap(final_surface, self.font_color, fgcolor)
-
-        # Must set colorkey otherwise background will not be transparent
-        final_surface.set_colorkey(self.colorkey)
+        # Only the font color can be swapped for the required color
+        if fgcolor is not None and self.font_color is None:
+            raise ValueError("Font has no 'font_color', cannot recolor the text.")
 
-        return (final_surface, pygame.Rect(0, 0, max_width, height))
+        return super().render(text, fgcolor, align)
@@ -45,17 +45,17 @@
         ...
 '''
 import pygame
-from . import BitmapFontProtocol, load_font_data_from_file, load_font_image, color_swap
+from . import BitmapFontProtocol, TextRenderMixin, SurfaceCache, load_font_data_from_file, load_font_image, color_swap, parse_color, RENDER_CACHE_PIXELS
 from pathlib import Path
 
-class BitmapFontFreeDims(BitmapFontProtocol):
+class BitmapFontFreeDims(TextRenderMixin, BitmapFontProtocol):
     '''Implementation of bitmap font using reference to the texture with characters in bitmap file and 
     json file specifiing position and dimension of individual font characters.
     '''
 
-    __slots__ = ['font_height', 'font_img', 'font_color', 'colorkey', 'spacing', 'characters', 'default_char']
+    __slots__ = ['font_height', 'font_img', 'font_color', 'colorkey', '_spacing', 'characters', '_default_char', '_supported_chars', '_substitution_table', '_char_widths', '_glyphs', '_fill_background', '_colorkey_pixel', '_row_stride', '_word_cache', '_render_cache']
 
-    def __init__(self, path: Path, size: int=None, fgcolor:pygame.Color=None, spacing: tuple[int, int]=(0,0), default_char: str='_'):
+    def __init__(self, path: Path, size: int=None, fgcolor:pygame.Color=None, spacing: tuple[int, int]=(0,0), default_char: str='_', render_cache_pixels: int=RENDER_CACHE_PIXELS, font_data: dict=None):
         ''' Prepare bitmap font from predefined path in given size and color.
 
         Parameters:
@@ -74,11 +74,23 @@ class BitmapFontFreeDims(BitmapFontProtocol):
             :param default_char: Character to be used for the character not present in the font.
             :type default_char: str (char)
 
+            :param render_cache_pixels: Max total number of pixels of the rendered texts, and separately of the rendered words, remembered for reuse. 0 disables remembering of rendered texts and words.
+            :type render_cache_pixels: int
+
+            :param font_data: Already loaded font data from the JSON file. If None, it is loaded from the path.
+            :type font_data: dict
+
             :raise: ValueError - in case there is a problem with font initiation
+            :raise: FileNotFoundError - in case the font definition file or the font image file cannot be found
         '''
 
-        # Get font data from the file
-        font_data = load_font_data_from_file(path=path)
+        # Recently rendered words and texts - forgotten whenever a setting they depend on changes
+        self._word_cache = SurfaceCache(render_cache_pixels)
+        self._render_cache = SurfaceCache(render_cache_pixels)
+
+        # Get font data from the file - unless already loaded by the caller
+        if font_data is None:
+            font_data = load_font_data_from_file(path=path)
 
         # Get font image based on the font data
         try:
@@ -91,13 +103,13 @@ class BitmapFontFreeDims(BitmapFontProtocol):
         try:
             assert ('font_color' in font_data and fgcolor) or not fgcolor, f"Missing 'font_color' key."
             self.font_color = font_data.get('font_color') 
-            if self.font_color: self.font_color = pygame.Color(self.font_color)
+            if self.font_color: self.font_color = parse_color(self.font_color)
         except AssertionError:
             raise ValueError
         
         # Set colorkey to correctly prepare the transparent parts of the font image
         try:
-            self.colorkey = pygame.Color(font_data.get('colorkey', '#000000'))
+            self.colorkey = parse_color(font_data.get('colorkey', '#000000'))
             assert self.font_color != self.colorkey, 'Color cannot be the same as the color key'
         except AssertionError:
             raise ValueError
@@ -105,26 +117,28 @@ class BitmapFontFreeDims(BitmapFontProtocol):
         # Set colorkey - for proper transparency
         self.font_img.set_colorkey(self.colorkey)
 
-        # How many pixels of space between characters
-        self.spacing = spacing
-
         # Store the original font height max of all characters
-        font_height = max(font_data['chars'][char]['height'] for char in font_data['chars'])
+        font_height = max(char_info['height'] for char_info in font_data['chars'].values())
 
         # Calculate the scaling factor for the font size
-        scale = 1 if size is None else size / font_height
+        # Kept as a fraction - integer math keeps the scaled characters pixel aligned
+        scale_num, scale_den = (1, 1) if size is None else (size, font_height)
 
         # Store the scaled font height
-        self.font_height = int(font_height * scale)
+        self.font_height = font_height * scale_num // scale_den
+
+        # How many pixels of space between characters - set once the font height is known
+        self.spacing = spacing
 
         # Store the coordinates and dimensions of the scaled characters
         self.characters = dict()
-        for char, char_info in font_data['chars'].copy().items():
-            self.characters[char] = dict()
-            self.characters[char]['x'] = int(char_info['x'] * scale)
-            self.characters[char]['y'] = int(char_info['y'] * scale)
-            self.characters[char]['width'] = int(char_info['width'] * scale)
-            self.characters[char]['height'] = int(char_info['height'] * scale)
+        for char, char_info in font_data['chars'].items():
+            self.characters[char] = {
+                'x': char_info['x'] * scale_num // scale_den,
+                'y': char_info['y'] * scale_num // scale_den,
+                'width': char_info['width'] * scale_num // scale_den,
+                'height': char_info['height'] * scale_num // scale_den
+            }
 
         # Default_char is not defined in the font file, use the first font character instead
         self.default_char = default_char if default_char in self.characters else next(iter(self.characters))
@@ -133,58 +147,33 @@ class BitmapFontFreeDims(BitmapFontProtocol):
         if fgcolor is not None:
             self.font_img = color_swap(self.font_img, self.font_color, fgcolor)
 
-        # Scale also the font image
-        self.font_img = pygame.transform.scale(self.font_img, (int(self.font_img.get_width() * scale), int(self.font_img.get_height() * scale)))
+        # Scale also the font image - not needed for the original font size
+        if scale_num != scale_den:
+            self.font_img = pygame.transform.scale(self.font_img, (self.font_img.get_width() * scale_num // scale_den, self.font_img.get_height() * scale_num // scale_den))
 
-    def _get_text_width(self, text: str) -> int:
-        ''' Returns width in pixels of the given text.
-        It is used internally in render function to determine the final dimensions
-        of a font surface.
-        '''
-        return sum([self.characters[char]['width'] for char in text]) + (self.spacing[0] * len(text))
+        # Colorkey mapped to the pixel value of the font image format - used for filling the render surfaces
+        self._colorkey_pixel = self.font_img.map_rgb(self.colorkey)
 
-    def _get_text_height(self, text: str=None)-> int:
-        ''' Returns height in pixels of the given text - without spacing because this function
-        is used in _render_row.
-        '''
-        #return max([self.characters[char]['height'] for char in text]) if text else self.font_height
-        return self.font_height
+        # New surfaces are filled with zero pixels, so the background needs to be filled only if the colorkey maps to other value
+        self._fill_background = self._colorkey_pixel != 0
 
-    def _substitute_unsuported_chars(self, text: str) -> str:
-        '''Cleans the text from characters that are not supported
-        by the font and substitutes them with the default character.
-        '''
-        return ''.join(list(map(lambda c: c if c in self.characters else self.default_char, text)))
+        # Pre-cut the character images from the scaled font image so that rendering does not need to build rects.
+        # Every character gets its own copy with the colorkey already set - blitting from a standalone
+        # RLE encoded surface is faster than blitting from a subsurface of the font image.
+        font_img_rect = self.font_img.get_rect()
+        for char_data in self.characters.values():
+            char_data['rect'] = pygame.Rect(char_data['x'], char_data['y'], char_data['width'], char_data['height'])
+            char_data['surf'] = self.font_img.subsurface(char_data['rect'].clip(font_img_rect)).copy()
+            char_data['surf'].set_colorkey(self._colorkey_pixel, pygame.RLEACCEL)
 
-    def _render_row(self, text: str) -> pygame.Surface:
-        ''' Returns surface containing text in a row.
-        It is used internally to render the final wrapped text surface
-        '''
-
-        # Clear the text from not covered characters
-        text = self._substitute_unsuported_chars(text)
-
-        # Prepare empty surface
-        row_surf = pygame.Surface((self._get_text_width(text), self._get_text_height(text)))
+        # Characters of the font - texts made only of them need no substitution
+        self._supported_chars = frozenset(self.characters)
 
-        # Fill the surface with the font background color
-        row_surf.fill(self.colorkey)
+        # Lookup table of character widths for fast text width calculation
+        self._char_widths = {char: char_data['width'] for char, char_data in self.characters.items()}
 
-        # Blit the text onto the surface
-        x_offset = 0
-
-        for char in text:
-            try:
-                # Get the part of the font_img with the right character
-                char_data = self.characters[char]
-                char_rect = pygame.Rect(char_data['x'], char_data['y'], char_data['width'], char_data['height'])
-                row_surf.blit(self.font_img, (x_offset, 0), char_rect) # blit only part of the font_img containing the character
-                x_offset += char_data['width'] + self.spacing[0]
-            except KeyError:
-                # Skip if the character is not defined by the font
-                pass
-
-        return row_surf
+        # Character image and width packed in a tuple - one lookup per character when rendering
+        self._glyphs = {char: (char_data['surf'], char_data['width']) for char, char_data in self.characters.items()}
 
     def get_metrics(self, text: str) -> list[tuple[int, int, int, int, int, int]]:
         '''Must be implemented due to compatibility with pygame.freetype.Font.
@@ -192,75 +181,20 @@ class BitmapFontFreeDims(BitmapFontProtocol):
         In case of BitmapFont min_x = max_x = horizontal_advance_x = width and same for y.
         '''
         res = []
-        
+        spacing_x, spacing_y = self.spacing
+
         for char in text:
-            x = self.characters[char]['width'] + self.spacing[0]
-            y = self.characters[char]['height'] + self.spacing[1]
+            char_data = self.characters[char]
+            x = char_data['width'] + spacing_x
+            y = char_data['height'] + spacing_y
             res.append((x,x,y,y,x,y))
-        
-        return res
 
-    def get_rect(self, text: str) -> pygame.Rect:
-        ''' Return the dimensions of the surface with generated text as a pygame Rect.
-        '''
-        return pygame.Rect(
-            0,
-            0,
-            max([self._get_text_width(self._substitute_unsuported_chars(row_text)) for row_text in text.split('\n')]), 
-            (self._get_text_height() + self.spacing[1]) * len(text.split('\n'))
-        )
+        return res
 
     def render(self, text: str, fgcolor:pygame.Color=None, align: str='LEFT') -> tuple[pygame.Surface, pygame.Rect]:
         ''' Renders given text in given
-        alignment to the new surface.
+        alignment to the new surface. The font is not recolored - fgcolor is ignored.
+        Rendered texts are cached - every call returns a new copy of the
+        surface, so it can be modified freely.
         '''
-
-        # Generate each row on a separate surface
-        rows_surfaces = []
-        max_width = 0 # Store the width of the longest line
-
-        # Prepare individual surface for every row
-        for row_text in text.split('\n'):
-
-            # Generate the row surface
-            row_surf = self._render_row(row_text)
-
-            # Update the max row width value
-            max_width = max(max_width, row_surf.get_width())
-
-            # Add to the list of row surfaces
-            rows_surfaces.append(row_surf)
-        
-        # Store the height of the whole text surface
-        height = (self._get_text_height() + self.spacing[1]) * len(rows_surfaces)
-
-        # Generate the new surface
-        final_surface = pygame.Surface((max_width, height))
-
-        # Fill the surface with the font background color
-        final_surface.fill(self.colorkey)
-
-        for i, row_surface in enumerate(rows_surfaces):
-
-            # Horizontal alignment
-            if align == 'LEFT':
-                x_align = 0
-            elif align == 'RIGHT':
-                #x_align = text_dim[0] - row_surface.get_width()
-                x_align = max_width - row_surface.get_width()
-
-            elif align in ['CENTER', 'CENTRE']:
-                #x_align = (text_dim[0] - row_surface.get_width()) // 2
-                x_align = (max_width - row_surface.get_width()) // 2
-
-            else:
-                x_align = 0
-
-            final_surface.blit(row_surface, (x_align, i * (row_surface.get_height() + self.spacing[1])))
-
-        # Must set colorkey otherwise background will not be transparent
-        final_surface.set_colorkey(self.colorkey)
-
-        return (final_surface, pygame.Rect(0, 0, max_width, height))
-
-
+        return super().render(text, None, align)
@@ -14,11 +14,8 @@ class Vect:
 
 def clip(surf, pos: tuple, size: tuple):
     """Get defined surface from the larger surface."""
-    handle_surf = surf.copy()
-    clip_rect = pygame.Rect(pos[0], pos[1], size[0], size[1])
-    handle_surf.set_clip(clip_rect)
-    image = surf.subsurface(handle_surf.get_clip())
-    return image.copy()
+    clip_rect = pygame.Rect(pos[0], pos[1], size[0], size[1]).clip(surf.get_rect())
+    return surf.subsurface(clip_rect).copy()
 
 def get_screen_cell_res_px(screen: pygame.Surface, grid_cnt: Vect) -> Vect:
     """Calculate the resolution of a grid cell on the screen."""
@@ -10,6 +10,7 @@ from pathlib import Path
 import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from pgbitmapfont import BitmapFont # Or from bitmapfont.bitmapfont import BitmapFont
+from pgbitmapfont import WORD_CACHE_MAX_LENGTH
 
 # Path to your test font fixtures
 TEST_FONT_DIR = Path(os.path.join(os.path.dirname(__file__), 'fonts'))
@@ -25,6 +26,7 @@ TEST_FIXED_HEIGHT_MISSING_CHAR_ORDER_FONT = Path(os.path.join(TEST_FONT_DIR, 'fi
 TEST_FIXED_HEIGHT_EMPTY_CHAR_ORDER_FONT = Path(os.path.join(TEST_FONT_DIR, 'fixed_height/empty_char_order_font.json'))
 TEST_FIXED_HEIGHT_INCORRECT_CHAR_ORDER_FONT = Path(os.path.join(TEST_FONT_DIR, 'fixed_height/incorrect_char_order_font.json'))
 TEST_FIXED_HEIGHT_INCORRECT_COLORKEY_FONT = Path(os.path.join(TEST_FONT_DIR, 'fixed_height/incorrect_colorkey_font.json'))
+TEST_FIXED_HEIGHT_COMMENTED_FONT = Path(os.path.join(TEST_FONT_DIR, 'fixed_height/commented_font.json'))
 
 
 class TestBitmapFontFixedHeight(unittest.TestCase):
@@ -120,6 +122,39 @@ class TestBitmapFontFixedHeight(unittest.TestCase):
             BitmapFont(TEST_FIXED_HEIGHT_INCORRECT_CHAR_ORDER_FONT)
 
 
+    def test_load_font_without_color(self):
+        """Test loading a font without font_color when no color change is required."""
+        font = BitmapFont(path=TEST_FIXED_HEIGHT_MISSING_COLOR_FONT)
+        self.assertIsNone(font.font_color)
+        self.assertGreater(font.render('Ahoj')[1].width, 0)
+
+
+    def test_render_font_without_color_in_other_color(self):
+        """Test that rendering in other color fails clearly for a font without font_color."""
+        font = BitmapFont(path=TEST_FIXED_HEIGHT_MISSING_COLOR_FONT)
+        with self.assertRaisesRegex(ValueError, "font_color"):
+            font.render('Ahoj', fgcolor=(0, 0, 255))
+
+
+    def test_load_commented_font(self):
+        """Test loading a font definition containing C-style comments."""
+        commented_font = BitmapFont(path=TEST_FIXED_HEIGHT_COMMENTED_FONT)
+
+        self.assertEqual(commented_font.characters.keys(), self.correct_font.characters.keys())
+        self.assertEqual(commented_font.get_rect('Ahoj'), self.correct_font.get_rect('Ahoj'))
+
+
+    def test_load_same_font_in_other_color(self):
+        """Test that fonts loaded from the same file do not share the font image."""
+        blue_font = BitmapFont(path=TEST_FIXED_HEIGHT_CORRECT_FONT, fgcolor=(0, 0, 255))
+        other_font = BitmapFont(path=TEST_FIXED_HEIGHT_CORRECT_FONT)
+
+        self.assertIsNot(blue_font.font_img, other_font.font_img)
+        # Color swap of one font must not recolor the other font
+        other_colors = {tuple(other_font.font_img.get_at((x, y))) for x in range(other_font.font_img.get_width()) for y in range(other_font.font_img.get_height())}
+        self.assertNotIn((0, 0, 255, 255), other_colors)
+
+
     # 2. Rendering Tests
     def test_render_simple_text(self):
         """Test rendering a simple string."""
@@ -168,6 +203,168 @@ class TestBitmapFontFixedHeight(unittest.TestCase):
         self.assertEqual(rendered_text[1].width, 2*a_character_char[1].width + 2*self.correct_font.spacing[0] + underscore_char[1].width)
 
 
+    def test_render_cached_text(self):
+        """Test that rendering the same text again returns an equal but new surface."""
+        if not self.test_surface: self.skipTest("Pygame screen not available for rendering test.")
+
+        first_render = self.correct_font.render(text="Ahoj\nAhoj", fgcolor=(255, 0, 0), align='CENTER')
+        second_render = self.correct_font.render(text="Ahoj\nAhoj", fgcolor=(255, 0, 0), align='CENTER')
+        other_render = self.correct_font.render(text="Ahoj\nAhoj", fgcolor=(255, 0, 0), align='RIGHT')
+
+        self.assertIsNot(first_render[0], second_render[0])
+        self.assertEqual(first_render[1], second_render[1])
+        self.assertEqual(pygame.image.tobytes(first_render[0], 'RGBA'), pygame.image.tobytes(second_render[0], 'RGBA'))
+        self.assertEqual(first_render[0].get_colorkey(), second_render[0].get_colorkey())
+        self.assertIsNot(first_render[0], other_render[0])
+
+
+    def test_render_cached_text_modified(self):
+        """Test that modifying the rendered surface does not affect the text rendered later."""
+        if not self.test_surface: self.skipTest("Pygame screen not available for rendering test.")
+
+        first_render = self.correct_font.render(text="Ahoj\nAhoj", fgcolor=(255, 0, 0))
+        expected_pixels = pygame.image.tobytes(first_render[0], 'RGBA')
+
+        first_render[0].set_alpha(128)
+        first_render[0].fill((1, 2, 3))
+
+        second_render = self.correct_font.render(text="Ahoj\nAhoj", fgcolor=(255, 0, 0))
+
+        self.assertIsNone(second_render[0].get_alpha())
+        self.assertEqual(pygame.image.tobytes(second_render[0], 'RGBA'), expected_pixels)
+
+
+    def test_render_cache_pixel_limit(self):
+        """Test that the rendered texts remembered by the font do not exceed the pixel limit."""
+        if not self.test_surface: self.skipTest("Pygame screen not available for rendering test.")
+
+        # Many distinct large texts - like a typewriter effect on a long paragraph
+        paragraph = "\n".join(["Ahoj Ahoj Ahoj Ahoj Ahoj"] * 10)
+
+        # Room for just a few of the rendered texts
+        font = BitmapFont(path=TEST_FIXED_HEIGHT_CORRECT_FONT)
+        limit = 3 * font.get_rect(paragraph).width * font.get_rect(paragraph).height
+        font = BitmapFont(path=TEST_FIXED_HEIGHT_CORRECT_FONT, render_cache_pixels=limit)
+
+        for length in range(len(paragraph)):
+            font.render(text=paragraph[:length + 1], fgcolor=(255, 0, 0))
+
+            cached_pixels = sum(surf.get_width() * surf.get_height() for surf, _ in font._render_cache.values())
+            self.assertLessEqual(cached_pixels, limit)
+            self.assertEqual(cached_pixels, font._render_cache.pixels)
+
+        # The most recently rendered text is still remembered
+        self.assertIn((paragraph, (255, 0, 0, 255), 'LEFT'), font._render_cache)
+
+
+    def test_word_cache_pixel_limit(self):
+        """Test that the rendered words remembered by the font do not exceed the pixel limit."""
+        if not self.test_surface: self.skipTest("Pygame screen not available for rendering test.")
+
+        # Many distinct words and one long token without spaces - like a typewriter effect on a long line
+        line = "Ah Aho AhojA AhojAh AhojAhoj AhojAhojAhojAhoj " * 3 + "Ahoj" * 250
+
+        # Room for just a few of the rendered words
+        font = BitmapFont(path=TEST_FIXED_HEIGHT_CORRECT_FONT)
+        limit = 3 * font.get_rect("AhojAhojAhojAhoj").width * font.get_rect("AhojAhojAhojAhoj").height
+        font = BitmapFont(path=TEST_FIXED_HEIGHT_CORRECT_FONT, render_cache_pixels=limit)
+
+        for length in range(len(line)):
+            font.render(text=line[:length + 1])
+
+            cached_pixels = sum(surf.get_width() * surf.get_height() for (surf, _), _ in font._word_cache.values())
+            self.assertLessEqual(cached_pixels, limit)
+            self.assertEqual(cached_pixels, font._word_cache.pixels)
+
+        # Long words are blitted character by character, never remembered
+        self.assertTrue(all(len(word) <= WORD_CACHE_MAX_LENGTH for word, _ in font._word_cache))
+        self.assertEqual(font.render(text=line)[1], font.get_rect(line))
+
+
+    def test_render_cache_disabled(self):
+        """Test that no rendered text is remembered if the pixel limit is 0."""
+        if not self.test_surface: self.skipTest("Pygame screen not available for rendering test.")
+
+        font = BitmapFont(path=TEST_FIXED_HEIGHT_CORRECT_FONT, render_cache_pixels=0)
+
+        first_render = font.render(text="Ahoj\nAhoj", fgcolor=(255, 0, 0))
+        second_render = font.render(text="Ahoj\nAhoj", fgcolor=(255, 0, 0))
+
+        self.assertEqual(len(font._render_cache), 0)
+        self.assertEqual(len(font._word_cache), 0)
+        self.assertEqual(first_render[1], second_render[1])
+
+
+    def test_render_colored_multiline_text(self):
+        """Test that the color is changed in all rows of a multiline text."""
+        if not self.test_surface: self.skipTest("Pygame screen not available for rendering test.")
+
+        rendered_text = self.correct_font.render(text="Ahoj\nAhoj\nAhoj", fgcolor=(0, 0, 255))
+        row_height = self.correct_font.font_height + self.correct_font.spacing[1]
+
+        for row in range(3):
+            row_colors = {tuple(rendered_text[0].get_at((x, y))) for x in range(rendered_text[1].width) for y in range(row * row_height, (row + 1) * row_height)}
+            # Original font color is swapped for the required color in every row
+            self.assertNotIn(tuple(self.correct_font.font_color), row_colors)
+            self.assertIn((0, 0, 255, 255), row_colors)
+
+
+    def test_render_same_words_in_other_color(self):
+        """Test that the same words rendered in different colors do not share the color."""
+        if not self.test_surface: self.skipTest("Pygame screen not available for rendering test.")
+
+        for color in [(0, 0, 255), (255, 0, 0), None]:
+            rendered_text = self.correct_font.render(text="Ahoj Ahoj", fgcolor=color)
+            text_colors = {tuple(rendered_text[0].get_at((x, y))) for x in range(rendered_text[1].width) for y in range(rendered_text[1].height)}
+            # Only the required color is used for the characters
+            self.assertIn(tuple(self.correct_font.font_color) if color is None else color + (255,), text_colors)
+            self.assertEqual(len(text_colors - {tuple(self.correct_font.colorkey)}), 1)
+
+
+    def test_render_in_repeated_color(self):
+        """Test that the characters are recolored only for a repeated color and the result looks the same."""
+        if not self.test_surface: self.skipTest("Pygame screen not available for rendering test.")
+
+        # Every render is done again - nothing is remembered
+        font = BitmapFont(path=TEST_FIXED_HEIGHT_CORRECT_FONT, render_cache_pixels=0)
+
+        # The first request of the color recolors the rendered text
+        first_render = font.render(text="Ahoj Ahoj", fgcolor=(0, 0, 255))
+        self.assertIsNone(font._glyph_sets[(0, 0, 255, 255)])
+
+        # The repeated request recolors the characters
+        second_render = font.render(text="Ahoj Ahoj", fgcolor=(0, 0, 255))
+        self.assertIsNotNone(font._glyph_sets[(0, 0, 255, 255)])
+
+        self.assertEqual(pygame.image.tobytes(first_render[0], 'RGBA'), pygame.image.tobytes(second_render[0], 'RGBA'))
+
+
+    def test_render_after_default_char_change(self):
+        """Test that changing the default character is reflected in the already rendered text."""
+        if not self.test_surface: self.skipTest("Pygame screen not available for rendering test.")
+
+        self.correct_font.render(text='AšA')
+        self.correct_font.default_char = 'A'
+
+        self.assertEqual(self.correct_font.render(text='AšA')[1].width, self.correct_font.render(text='AAA')[1].width)
+
+
+    def test_render_after_spacing_change(self):
+        """Test that changing the spacing is reflected in the already rendered text."""
+        if not self.test_surface: self.skipTest("Pygame screen not available for rendering test.")
+
+        width_AB = self.correct_font.render('AB')[1].width
+        self.correct_font.spacing = (self.correct_font.spacing[0] + 3, self.correct_font.spacing[1])
+
+        self.assertEqual(self.correct_font.render('AB')[1].width, width_AB + 2*3)
+
+        # Vertical spacing is added to every row
+        self.correct_font.spacing = (self.correct_font.spacing[0], self.correct_font.spacing[1] + 2)
+
+        self.assertEqual(self.correct_font.render('A\nB')[1].height, 2 * (self.correct_font.font_height + self.correct_font.spacing[1]))
+        self.assertEqual(self.correct_font.get_rect('A\nB').height, 2 * (self.correct_font.font_height + self.correct_font.spacing[1]))
+
+
     # 3. Text Measurement / Metrics (if applicable)
     def test_text_width(self):
         """Test that the dimensions are reflecting characters and spacing"""
@@ -10,6 +10,7 @@ from pathlib import Path
 import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from pgbitmapfont import BitmapFont # Or from bitmapfont.bitmapfont import BitmapFont
+from pgbitmapfont import WORD_CACHE_MAX_LENGTH
 
 # Path to your test font fixtures
 TEST_FONT_DIR = Path(os.path.join(os.path.dirname(__file__), 'fonts'))
@@ -40,6 +41,10 @@ class TestBitmapFontFreeDims(unittest.TestCase):
             print(f"Warning: Pygame display init failed: {e}. Some rendering tests might not run correctly.")
             cls.screen = None
 
+        # Fonts are loaded only once for all the tests - tests must not change them
+        cls.correct_font = BitmapFont(path=TEST_FREE_DIMS_CORRECT_FONT)
+        # Create scaled font
+        cls.scaled_font = BitmapFont(path=TEST_FREE_DIMS_CORRECT_FONT, size=32, spacing=(2,2))
 
     @classmethod
     def tearDownClass(cls):
@@ -47,12 +52,8 @@ class TestBitmapFontFreeDims(unittest.TestCase):
 
     def setUp(self):
         # This method is called before each test function.
-        # You can create a fresh font instance here if needed,
-        # but often it's better to load it once if it's read-only.
-        self.correct_font = BitmapFont(path=TEST_FREE_DIMS_CORRECT_FONT)
-        # Create scaled font
-        self.scaled_font = BitmapFont(path=TEST_FREE_DIMS_CORRECT_FONT, size=32, spacing=(2,2))
-
+        # Fonts are read-only and loaded once in setUpClass,
+        # only the cheap per-test state is created here.
         if TestBitmapFontFreeDims.screen:
             self.test_surface = pygame.Surface((100, 50)) # A small surface for rendering tests
             self.test_surface.fill((0,0,0)) # Fill with black
@@ -150,6 +151,111 @@ class TestBitmapFontFreeDims(unittest.TestCase):
         self.assertEqual(rendered_text[1].width, 2*a_character_char[1].width + 2*self.correct_font.spacing[0] + underscore_char[1].width)
 
 
+    def test_render_cached_text(self):
+        """Test that rendering the same text again returns an equal but new surface."""
+        if not self.test_surface: self.skipTest("Pygame screen not available for rendering test.")
+
+        first_render = self.correct_font.render(text="Ahoj\nAhoj", align='CENTER')
+        second_render = self.correct_font.render(text="Ahoj\nAhoj", align='CENTER')
+        other_render = self.correct_font.render(text="Ahoj\nAhoj", align='RIGHT')
+
+        self.assertIsNot(first_render[0], second_render[0])
+        self.assertEqual(first_render[1], second_render[1])
+        self.assertEqual(pygame.image.tobytes(first_render[0], 'RGBA'), pygame.image.tobytes(second_render[0], 'RGBA'))
+        self.assertEqual(first_render[0].get_colorkey(), second_render[0].get_colorkey())
+        self.assertIsNot(first_render[0], other_render[0])
+
+
+    def test_render_cached_text_modified(self):
+        """Test that modifying the rendered surface does not affect the text rendered later."""
+        if not self.test_surface: self.skipTest("Pygame screen not available for rendering test.")
+
+        first_render = self.correct_font.render(text="Ahoj\nAhoj")
+        expected_pixels = pygame.image.tobytes(first_render[0], 'RGBA')
+
+        first_render[0].set_alpha(128)
+        first_render[0].fill((1, 2, 3))
+
+        second_render = self.correct_font.render(text="Ahoj\nAhoj")
+
+        self.assertIsNone(second_render[0].get_alpha())
+        self.assertEqual(pygame.image.tobytes(second_render[0], 'RGBA'), expected_pixels)
+
+
+    def test_render_cache_pixel_limit(self):
+        """Test that the rendered texts remembered by the font do not exceed the pixel limit."""
+        if not self.test_surface: self.skipTest("Pygame screen not available for rendering test.")
+
+        # Many distinct large texts - like a typewriter effect on a long paragraph
+        paragraph = "\n".join(["Ahoj Ahoj Ahoj Ahoj Ahoj"] * 10)
+
+        # Room for just a few of the rendered texts
+        font = BitmapFont(path=TEST_FREE_DIMS_CORRECT_FONT)
+        limit = 3 * font.get_rect(paragraph).width * font.get_rect(paragraph).height
+        font = BitmapFont(path=TEST_FREE_DIMS_CORRECT_FONT, render_cache_pixels=limit)
+
+        for length in range(len(paragraph)):
+            font.render(text=paragraph[:length + 1])
+
+            cached_pixels = sum(surf.get_width() * surf.get_height() for surf, _ in font._render_cache.values())
+            self.assertLessEqual(cached_pixels, limit)
+            self.assertEqual(cached_pixels, font._render_cache.pixels)
+
+        # The most recently rendered text is still remembered
+        self.assertIn((paragraph, None, 'LEFT'), font._render_cache)
+
+
+    def test_word_cache_pixel_limit(self):
+        """Test that the rendered words remembered by the font do not exceed the pixel limit."""
+        if not self.test_surface: self.skipTest("Pygame screen not available for rendering test.")
+
+        # Many distinct words and one long token without spaces - like a typewriter effect on a long line
+        line = "Ah Aho AhojA AhojAh AhojAhoj AhojAhojAhojAhoj " * 3 + "Ahoj" * 250
+
+        # Room for just a few of the rendered words
+        font = BitmapFont(path=TEST_FREE_DIMS_CORRECT_FONT)
+        limit = 3 * font.get_rect("AhojAhojAhojAhoj").width * font.get_rect("AhojAhojAhojAhoj").height
+        font = BitmapFont(path=TEST_FREE_DIMS_CORRECT_FONT, render_cache_pixels=limit)
+
+        for length in range(len(line)):
+            font.render(text=line[:length + 1])
+
+            cached_pixels = sum(surf.get_width() * surf.get_height() for (surf, _), _ in font._word_cache.values())
+            self.assertLessEqual(cached_pixels, limit)
+            self.assertEqual(cached_pixels, font._word_cache.pixels)
+
+        # Long words are blitted character by character, never remembered
+        self.assertTrue(all(len(word) <= WORD_CACHE_MAX_LENGTH for word, _ in font._word_cache))
+        self.assertEqual(font.render(text=line)[1], font.get_rect(line))
+
+
+    def test_render_cache_disabled(self):
+        """Test that no rendered text is remembered if the pixel limit is 0."""
+        if not self.test_surface: self.skipTest("Pygame screen not available for rendering test.")
+
+        font = BitmapFont(path=TEST_FREE_DIMS_CORRECT_FONT, render_cache_pixels=0)
+
+        first_render = font.render(text="Ahoj\nAhoj")
+        second_render = font.render(text="Ahoj\nAhoj")
+
+        self.assertEqual(len(font._render_cache), 0)
+        self.assertEqual(len(font._word_cache), 0)
+        self.assertEqual(first_render[1], second_render[1])
+
+
+    def test_render_after_spacing_change(self):
+        """Test that changing the spacing is reflected in the already rendered text."""
+        if not self.test_surface: self.skipTest("Pygame screen not available for rendering test.")
+
+        # Changed font must not be shared with other tests
+        font = BitmapFont(path=TEST_FREE_DIMS_CORRECT_FONT)
+
+        width_AB = font.render('AB')[1].width
+        font.spacing = (font.spacing[0] + 3, font.spacing[1])
+
+        self.assertEqual(font.render('AB')[1].width, width_AB + 2*3)
+
+
     # 3. Text Measurement / Metrics (if applicable)
     def test_text_width(self):
         """Test that the dimensions are reflecting characters and spoacing"""